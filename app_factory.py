@@ -0,0 +1,130 @@
+from flask import Flask, Response, request, render_template, jsonify
+from flask.json.provider import JSONProvider
+from streaming_form_data import StreamingFormDataParser
+from streaming_form_data.parser import ParseFailedException, parse_content_boundary
+from streaming_form_data.targets import ValueTarget
+from drawing_comparator import DrawingComparator
+from typing import Optional
+from dataclasses import asdict
+import orjson
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'pdf'}
+ALLOWED_SUFFIXES = tuple(f'.{ext}' for ext in ALLOWED_EXTENSIONS)
+STREAM_CHUNK_SIZE = 64 * 1024  # Read uploads from the request stream in 64KB chunks
+
+class OrjsonProvider(JSONProvider):
+    """Route jsonify and request.get_json through orjson."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+def create_app(comparator: Optional[DrawingComparator] = None) -> Flask:
+    """Build the Flask app shared by the local (app.py) and Vercel (api/index.py) entry points."""
+    app = Flask(__name__)
+    app.json = OrjsonProvider(app)
+    app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
+    _register_routes(app, comparator or DrawingComparator())
+    return app
+
+def allowed_file(filename):
+    return filename.lower().endswith(ALLOWED_SUFFIXES)
+
+def receive_uploads():
+    """Parse the multipart body for file1/file2 into memory, bypassing request.files.
+
+    Raises ParseFailedException for a malformed body, including one cut off before
+    its closing boundary (the parser alone would hand back the truncated part).
+    """
+    parser = StreamingFormDataParser(headers=request.headers)
+    targets = []
+    for field in ('file1', 'file2'):
+        target = ValueTarget()
+        parser.register(field, target)
+        targets.append(target)
+
+    closing = b'\r\n--' + parse_content_boundary(request.headers) + b'--'
+    tail = b''  # End of the previous chunk, in case the closing boundary straddles two reads
+    closed = False
+    while True:
+        chunk = request.stream.read(STREAM_CHUNK_SIZE)
+        if not chunk:
+            break
+        parser.data_received(chunk)
+        if not closed:
+            window = tail + chunk
+            closed = closing in window
+            tail = window[-(len(closing) - 1):]
+    if not closed:
+        raise ParseFailedException("Missing closing boundary")
+    return targets
+
+def _register_routes(app: Flask, comparator: DrawingComparator) -> None:
+    @app.route('/')
+    def index():
+        try:
+            logger.info("Serving index page")
+            return render_template('index.html')
+        except Exception as e:
+            logger.error("Error serving index: %s", e)
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/compare', methods=['POST'])
+    def compare_drawings():
+        logger.info("Starting comparison request")
+
+        try:
+            file1, file2 = receive_uploads()
+        except ParseFailedException as e:
+            logger.error("Failed to parse upload: %s", e)
+            return jsonify({'error': 'Malformed upload'}), 400
+
+        try:
+            if file1.multipart_filename is None or file2.multipart_filename is None:
+                return jsonify({'error': 'Both files are required'}), 400
+
+            if file1.multipart_filename == '' or file2.multipart_filename == '':
+                return jsonify({'error': 'No selected files'}), 400
+
+            if not (allowed_file(file1.multipart_filename) and allowed_file(file2.multipart_filename)):
+                return jsonify({'error': 'Invalid file type. Only PNG, JPG, JPEG, and PDF are allowed.'}), 400
+
+            logger.info("Processing files: %s, %s", file1.multipart_filename, file2.multipart_filename)
+
+            # Compare drawings using Google Cloud Vision, OCR-ing both uploads concurrently from memory
+            result = comparator.compare_drawing_bytes(
+                file1.value, file1.multipart_filename,
+                file2.value, file2.multipart_filename
+            )
+
+            logger.info("Comparison completed")
+
+            # Return result as JSON
+            return jsonify(asdict(result))
+
+        except Exception as e:
+            logger.error("Error in compare_drawings: %s", e)
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/download_result', methods=['POST'])
+    def download_result():
+        try:
+            logger.info("Starting download request")
+            data = request.get_json()
+            if not data:
+                return jsonify({'error': 'No data provided'}), 400
+            logger.info("Download file prepared")
+            return Response(
+                orjson.dumps(data, option=orjson.OPT_INDENT_2),
+                mimetype='application/json',
+                headers={'Content-Disposition': 'attachment; filename=comparison_result.json'}
+            )
+        except Exception as e:
+            logger.error("Error in download_result: %s", e)
+            return jsonify({'error': str(e)}), 500
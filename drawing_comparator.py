@@ -1,15 +1,200 @@
 import os
 import base64
-from typing import List
-import difflib
+import functools
+import hashlib
+import threading
+import uuid
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import List, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
-from google.cloud import vision
-from google.cloud import storage  # Import Google Cloud Storage client
 import tempfile  # For creating temporary files in serverless environments
-import json  # Import json module for decoding the key
+import orjson  # Faster JSON for the service-account key and the result cache
 
-@dataclass
+try:
+    # Cython build of difflib with the same API and results
+    from cydifflib import SequenceMatcher
+except ImportError:
+    try:
+        # C-accelerated subclass of difflib's matcher
+        from cdifflib import CSequenceMatcher as SequenceMatcher
+    except ImportError:
+        from difflib import SequenceMatcher
+
+# Configuration comes from the environment, read once at import
+_ENV = {
+    name: os.environ.get(name)
+    for name in ("GOOGLE_CLOUD_VISION_KEY_BASE64", "GOOGLE_CLOUD_STORAGE_BUCKET", "OCR_CACHE_DIR", "RESULT_CACHE_DIR")
+}
+
+# Persists OCR text across requests on a warm instance; set OCR_CACHE_DIR="" to keep it in memory only
+OCR_CACHE_DIR = _ENV["OCR_CACHE_DIR"] if _ENV["OCR_CACHE_DIR"] is not None else '/tmp/ocr_cache'
+OCR_MEMORY_CACHE_SIZE = 128
+OCR_DISK_CACHE_SIZE = 256  # Files kept in OCR_CACHE_DIR before the least recently used are evicted
+INLINE_PDF_MAX_BYTES = 20 * 1024 * 1024  # PDFs up to this size are sent to Vision inline instead of via GCS
+# Score and diff per (text1, text2) pair; set RESULT_CACHE_DIR="" to disable
+RESULT_CACHE_DIR = _ENV["RESULT_CACHE_DIR"] if _ENV["RESULT_CACHE_DIR"] is not None else '/tmp/comparison_cache'
+RESULT_CACHE_SIZE = 64  # Each entry can hold up to MAX_DIFF_LINES lines, so keep fewer of them
+QUICK_RATIO_THRESHOLD = 0.1  # Default ratio_skip_threshold: below this upper bound, skip character-level scoring
+DIFF_CONTEXT_LINES = 3  # Unchanged lines shown around each hunk, as in difflib.unified_diff
+CHAR_MATCH_REGION_LIMIT = 4096  # Replaced regions larger than this are matched line pair by line pair
+MAX_DIFF_LINES = 10_000  # Diff lines kept per comparison; more than this isn't readable anyway
+# Bump RESULT_CACHE_VERSION whenever scoring or diff formatting changes, so stale entries are never served
+RESULT_CACHE_VERSION = 3
+RESULT_CACHE_PREFIX = f"v{RESULT_CACHE_VERSION}-c{DIFF_CONTEXT_LINES}-m{MAX_DIFF_LINES}"
+
+def _unlink_quietly(file_path: str) -> None:
+    try:
+        os.unlink(file_path)
+    except FileNotFoundError:
+        pass
+
+@functools.lru_cache(maxsize=1)
+def _service_account_info() -> dict:
+    """Decode the base64-encoded service-account key from the environment, once per process."""
+    encoded_key = _ENV["GOOGLE_CLOUD_VISION_KEY_BASE64"]
+    if not encoded_key:
+        raise Exception("Environment variable GOOGLE_CLOUD_VISION_KEY_BASE64 is not set.")
+    return orjson.loads(base64.b64decode(encoded_key))
+
+def _content_digest(content: bytes) -> str:
+    """Hex digest identifying file content, used as the OCR cache key.
+
+    The caches and GCS blob names keyed by this are shared by every user, so it
+    must be collision-resistant; SHA-256 costs milliseconds next to a Vision call.
+    """
+    return hashlib.sha256(content).hexdigest()
+
+def _write_cache_file(cache_path: str, data: str, max_entries: int) -> None:
+    """Atomically write a cache entry, keeping at most max_entries files in its directory.
+
+    The disk caches are best-effort, so failures are ignored.
+    """
+    cache_dir = os.path.dirname(cache_path)
+    try:
+        # Dot-prefixed so a concurrent prune never counts or evicts a half-written entry
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=cache_dir, prefix='.', delete=False) as f:
+            f.write(data)
+        os.replace(f.name, cache_path)
+        _prune_cache_dir(cache_dir, max_entries)
+    except OSError:
+        pass
+
+def _prune_cache_dir(cache_dir: str, max_entries: int) -> None:
+    """Evict the least recently used entries so a cache in /tmp can't fill the instance's disk."""
+    with os.scandir(cache_dir) as it:
+        entries = [entry for entry in it if not entry.name.startswith('.')]
+    if len(entries) <= max_entries:
+        return
+    entries.sort(key=lambda entry: entry.stat().st_mtime)
+    for entry in entries[:len(entries) - max_entries]:
+        _unlink_quietly(entry.path)
+
+def _mark_cache_file_used(cache_path: str) -> None:
+    """Bump a cache entry's mtime on a hit, which is what _prune_cache_dir orders eviction by."""
+    try:
+        os.utime(cache_path)
+    except OSError:
+        pass
+
+def _common_affix_lengths(a: List[str], b: List[str]) -> Tuple[int, int]:
+    """Count the leading and trailing items two sequences share, without letting them overlap."""
+    limit = min(len(a), len(b))
+    prefix = 0
+    while prefix < limit and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and a[-1 - suffix] == b[-1 - suffix]:
+        suffix += 1
+    return prefix, suffix
+
+def _opcodes_from_blocks(blocks: List[Tuple[int, int, int]], len1: int, len2: int) -> List[Tuple[str, int, int, int, int]]:
+    """Turn ordered matching blocks into SequenceMatcher.get_opcodes()-style edit operations."""
+    opcodes = []
+    i = j = 0
+    for block_i, block_j, size in blocks + [(len1, len2, 0)]:
+        if i < block_i and j < block_j:
+            opcodes.append(('replace', i, block_i, j, block_j))
+        elif i < block_i:
+            opcodes.append(('delete', i, block_i, j, block_j))
+        elif j < block_j:
+            opcodes.append(('insert', i, block_i, j, block_j))
+        i, j = block_i + size, block_j + size
+        if size:
+            opcodes.append(('equal', block_i, i, block_j, j))
+    return opcodes
+
+def _grouped_opcodes(opcodes: List[Tuple[str, int, int, int, int]], n: int):
+    """Split opcodes into hunks with n lines of context, like SequenceMatcher.get_grouped_opcodes()."""
+    codes = list(opcodes) or [('equal', 0, 1, 0, 1)]
+    if codes[0][0] == 'equal':
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    if codes[-1][0] == 'equal':
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+
+    group = []
+    for tag, i1, i2, j1, j2 in codes:
+        # Long unchanged runs close one hunk and open the next
+        if tag == 'equal' and i2 - i1 > 2 * n:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == 'equal'):
+        yield group
+
+def _format_unified_range(start: int, stop: int) -> str:
+    """Hunk header range in unified diff notation."""
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f'{beginning}'
+    if not length:
+        beginning -= 1
+    return f'{beginning},{length}'
+
+def _unified_diff(lines1: List[str], lines2: List[str], opcodes: List[Tuple[str, int, int, int, int]]):
+    """Yield the same lines as difflib.unified_diff(lineterm=''), from opcodes that were already computed."""
+    started = False
+    for group in _grouped_opcodes(opcodes, DIFF_CONTEXT_LINES):
+        if not started:
+            started = True
+            yield '--- File 1'
+            yield '+++ File 2'
+        first, last = group[0], group[-1]
+        yield f'@@ -{_format_unified_range(first[1], last[2])} +{_format_unified_range(first[3], last[4])} @@'
+        for tag, i1, i2, j1, j2 in group:
+            if tag == 'equal':
+                for line in lines1[i1:i2]:
+                    yield ' ' + line
+                continue
+            if tag in ('replace', 'delete'):
+                for line in lines1[i1:i2]:
+                    yield '-' + line
+            if tag in ('replace', 'insert'):
+                for line in lines2[j1:j2]:
+                    yield '+' + line
+
+def _replaced_chars_matched(region1: List[str], region2: List[str]) -> int:
+    """Count the characters a replaced region still shares, line breaks excluded."""
+    if sum(map(len, region1)) + sum(map(len, region2)) <= CHAR_MATCH_REGION_LIMIT:
+        text1 = '\n'.join(region1)
+        # autojunk would treat every common character of a region over 200 characters as junk
+        matcher = SequenceMatcher(None, text1, '\n'.join(region2), autojunk=False)
+        return sum(size - text1.count('\n', i, i + size) for i, _, size in matcher.get_matching_blocks())
+    # Character matching a large region is quadratic, so pair its lines up in order instead
+    return sum(
+        size
+        for line1, line2 in zip(region1, region2)
+        for _, _, size in SequenceMatcher(None, line1, line2, autojunk=False).get_matching_blocks()
+    )
+
+@dataclass(slots=True)
 class ComparisonResult:
     similarity_score: float
     differences: List[str]
@@ -18,37 +203,81 @@ class ComparisonResult:
     file2_text: str
 
 class DrawingComparator:
+    # Clients are shared by every instance in the process so their gRPC/HTTP channels are reused
+    _vision_client = None
+    _storage_client = None
+
     def __init__(self):
         """Initialize the DrawingComparator with Google Cloud Vision and Storage clients."""
-        # Decode the base64-encoded key from the environment variable
-        encoded_key = os.environ.get("GOOGLE_CLOUD_VISION_KEY_BASE64")
-        if not encoded_key:
-            raise Exception("Environment variable GOOGLE_CLOUD_VISION_KEY_BASE64 is not set.")
-        
-        # Decode the key and initialize the Vision client with credentials
-        decoded_key = base64.b64decode(encoded_key).decode("utf-8")
-        self.client = vision.ImageAnnotatorClient.from_service_account_info(json.loads(decoded_key))
-        
-        # Initialize Google Cloud Storage client
-        self.storage_client = storage.Client.from_service_account_info(json.loads(decoded_key))
+        if DrawingComparator._vision_client is None or DrawingComparator._storage_client is None:
+            # The Google Cloud SDKs are slow to import, so they load only once clients are needed
+            from google.cloud import vision, storage
+            service_account_info = _service_account_info()
+            DrawingComparator._vision_client = vision.ImageAnnotatorClient.from_service_account_info(service_account_info)
+            DrawingComparator._storage_client = storage.Client.from_service_account_info(service_account_info)
+        self.client = DrawingComparator._vision_client
+        self.storage_client = DrawingComparator._storage_client
         
         # Get the bucket name from the environment variable
-        self.bucket_name = os.environ.get("GOOGLE_CLOUD_STORAGE_BUCKET")
+        self.bucket_name = _ENV["GOOGLE_CLOUD_STORAGE_BUCKET"]
         if not self.bucket_name:
             raise Exception("Environment variable GOOGLE_CLOUD_STORAGE_BUCKET is not set.")
+        # A bucket handle is a local object (no request is made), so one serves every upload
+        self.bucket = self.storage_client.bucket(self.bucket_name)
+
+        # Scores whose quick upper bound falls below this are reported as that bound
+        self.ratio_skip_threshold = QUICK_RATIO_THRESHOLD
+
+        # OCR results keyed by a hash of the file content
+        self._ocr_cache = OrderedDict()
+        self._ocr_cache_lock = threading.Lock()
+        for cache_dir in (OCR_CACHE_DIR, RESULT_CACHE_DIR):
+            if cache_dir and not os.path.isdir(cache_dir):
+                try:
+                    os.makedirs(cache_dir, exist_ok=True)
+                except OSError:
+                    pass  # Without the directory that disk cache is simply skipped
 
     def upload_to_gcs(self, file_path: str) -> str:
         """Upload a file to Google Cloud Storage and return its GCS URI."""
-        bucket = self.storage_client.bucket(self.bucket_name)
-        blob_name = os.path.basename(file_path)
-        blob = bucket.blob(blob_name)
+        # Unique names keep concurrent uploads of e.g. two "drawing.pdf" files apart
+        blob_name = f"{uuid.uuid4().hex}{os.path.splitext(file_path)[1].lower()}"
+        blob = self.bucket.blob(blob_name)
         blob.upload_from_filename(file_path)
         return f"gs://{self.bucket_name}/{blob_name}"
 
+    def upload_bytes_to_gcs(self, content: bytes, blob_name: str, content_type: str) -> str:
+        """Upload in-memory file content to Google Cloud Storage and return its GCS URI.
+
+        blob_name must be derived from the content (e.g. its hash): an existing blob of
+        that name is assumed to hold the same bytes and the upload is skipped.
+        """
+        blob = self.bucket.blob(blob_name)
+        if not blob.exists():
+            blob.upload_from_string(content, content_type=content_type)
+        return f"gs://{self.bucket_name}/{blob_name}"
+
     def extract_text_from_pdf(self, file_path: str) -> str:
         """Extract text from a PDF using Google Cloud Vision."""
-        gcs_uri = self.upload_to_gcs(file_path)
-        input_config = vision.InputConfig(gcs_source=vision.GcsSource(uri=gcs_uri), mime_type="application/pdf")
+        if os.path.getsize(file_path) <= INLINE_PDF_MAX_BYTES:
+            with open(file_path, 'rb') as f:
+                return self._annotate_pdf(content=f.read())
+        return self._annotate_pdf(gcs_uri=self.upload_to_gcs(file_path))
+
+    def extract_text_from_pdf_bytes(self, content: bytes, blob_name: str) -> str:
+        """Extract text from in-memory PDF content using Google Cloud Vision."""
+        if len(content) <= INLINE_PDF_MAX_BYTES:
+            return self._annotate_pdf(content=content)
+        return self._annotate_pdf(gcs_uri=self.upload_bytes_to_gcs(content, blob_name, "application/pdf"))
+
+    def _annotate_pdf(self, gcs_uri: Optional[str] = None, content: Optional[bytes] = None) -> str:
+        """Run document text detection on a PDF, sent inline as content or read from a GCS URI."""
+        from google.cloud import vision
+        if content is not None:
+            # Inline content skips the GCS upload round-trip entirely
+            input_config = vision.InputConfig(content=content, mime_type="application/pdf")
+        else:
+            input_config = vision.InputConfig(gcs_source=vision.GcsSource(uri=gcs_uri), mime_type="application/pdf")
         request = vision.AnnotateFileRequest(
             features=[vision.Feature(type_=vision.Feature.Type.DOCUMENT_TEXT_DETECTION)],
             input_config=input_config
@@ -63,40 +292,150 @@ class DrawingComparator:
 
     def extract_text_from_file(self, file_path: str) -> str:
         """Extract text from an image or PDF file."""
-        if file_path.lower().endswith(".pdf"):
-            return self.extract_text_from_pdf(file_path)
-        return self.extract_text_from_image(file_path)
+        with open(file_path, 'rb') as f:
+            content = f.read()
+        return self.extract_text_from_bytes(content, file_path)
+
+    def extract_text_from_bytes(self, content: bytes, filename: str) -> str:
+        """Extract text from in-memory image or PDF content, reusing OCR results for identical content."""
+        return self.extract_texts_from_bytes([(content, filename)])[0]
+
+    def extract_texts_from_bytes(self, files: List[Tuple[bytes, str]]) -> List[str]:
+        """Extract text from several (content, filename) pairs with as few Vision round-trips as possible.
+
+        Cached and duplicate content is skipped, all remaining images go out in one
+        batch_annotate_images call, and PDFs (which Vision only accepts one per
+        batch_annotate_files call) run concurrently alongside it.
+        """
+        digests = [_content_digest(content) for content, _ in files]
+        texts = {}
+        images = {}
+        pdfs = {}
+        for digest, (content, filename) in zip(digests, files):
+            if digest in texts or digest in images or digest in pdfs:
+                continue
+            cached = self._get_cached_text(digest)
+            if cached is not None:
+                texts[digest] = cached
+            elif filename.lower().endswith(".pdf"):
+                pdfs[digest] = content
+            else:
+                images[digest] = content
+
+        with ThreadPoolExecutor(max_workers=max(len(pdfs), 1)) as executor:
+            pdf_futures = {
+                digest: executor.submit(self.extract_text_from_pdf_bytes, content, f"{digest}.pdf")
+                for digest, content in pdfs.items()
+            }
+            if images:
+                texts.update(zip(images, self.extract_text_from_images_bytes(list(images.values()))))
+            for digest, future in pdf_futures.items():
+                texts[digest] = future.result()
+
+        for digest in [*images, *pdfs]:
+            self._store_cached_text(digest, texts[digest])
+        return [texts[digest] for digest in digests]
+
+    def _get_cached_text(self, digest: str) -> Optional[str]:
+        """Look up OCR text by content hash, in memory first and then on disk."""
+        with self._ocr_cache_lock:
+            if digest in self._ocr_cache:
+                self._ocr_cache.move_to_end(digest)
+                return self._ocr_cache[digest]
+        if not OCR_CACHE_DIR:
+            return None
+        cache_path = os.path.join(OCR_CACHE_DIR, f"{digest}.txt")
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except OSError:
+            return None
+        _mark_cache_file_used(cache_path)
+        self._remember_text(digest, text)
+        return text
+
+    def _store_cached_text(self, digest: str, text: str) -> None:
+        """Save OCR text under its content hash in memory and on disk."""
+        self._remember_text(digest, text)
+        if OCR_CACHE_DIR:
+            _write_cache_file(os.path.join(OCR_CACHE_DIR, f"{digest}.txt"), text, OCR_DISK_CACHE_SIZE)
+
+    def _remember_text(self, digest: str, text: str) -> None:
+        """Insert into the in-memory LRU, evicting the oldest entry when full."""
+        with self._ocr_cache_lock:
+            self._ocr_cache[digest] = text
+            self._ocr_cache.move_to_end(digest)
+            if len(self._ocr_cache) > OCR_MEMORY_CACHE_SIZE:
+                self._ocr_cache.popitem(last=False)
 
     def extract_text_from_image(self, file_path: str) -> str:
         """Extract text from an image using Google Cloud Vision."""
         with open(file_path, 'rb') as image_file:
             content = image_file.read()
+        return self.extract_text_from_image_bytes(content)
+
+    def extract_text_from_image_bytes(self, content: bytes) -> str:
+        """Extract text from in-memory image content using Google Cloud Vision."""
+        from google.cloud import vision
         image = vision.Image(content=content)
         response = self.client.text_detection(image=image)
         if response.error.message:
             raise Exception(f"Google Vision API error: {response.error.message}")
         return response.full_text_annotation.text
 
+    def extract_text_from_images_bytes(self, contents: List[bytes]) -> List[str]:
+        """Extract text from several in-memory images in a single Google Cloud Vision request."""
+        from google.cloud import vision
+        requests = [
+            vision.AnnotateImageRequest(
+                image=vision.Image(content=content),
+                features=[vision.Feature(type_=vision.Feature.Type.TEXT_DETECTION)]
+            )
+            for content in contents
+        ]
+        response = self.client.batch_annotate_images(requests=requests)
+        texts = []
+        for image_response in response.responses:
+            if image_response.error.message:
+                raise Exception(f"Google Vision API error: {image_response.error.message}")
+            texts.append(image_response.full_text_annotation.text)
+        return texts
+
     def compare_drawings(self, file1_path: str, file2_path: str) -> ComparisonResult:
         """Compare two files (images or PDFs) by extracting and comparing their text."""
         try:
-            text1 = self.extract_text_from_file(file1_path)
-            text2 = self.extract_text_from_file(file2_path)
+            content1 = self._read_and_remove(file1_path)
+        except Exception:
+            self._remove_files(file2_path)
+            raise
+        content2 = self._read_and_remove(file2_path)
+        text1, text2 = self.extract_texts_from_bytes([(content1, file1_path), (content2, file2_path)])
+
+        return self._build_result(text1, text2)
+
+    def compare_drawing_bytes(self, content1: bytes, filename1: str,
+                              content2: bytes, filename2: str) -> ComparisonResult:
+        """Compare two uploaded files held in memory; both are OCR'd concurrently."""
+        text1, text2 = self.extract_texts_from_bytes([(content1, filename1), (content2, filename2)])
+
+        return self._build_result(text1, text2)
+
+    def _read_and_remove(self, file_path: str) -> bytes:
+        """Read a temporary file into memory and release it immediately; OCR only needs the bytes."""
+        try:
+            with open(file_path, 'rb') as f:
+                return f.read()
         finally:
-            # Clean up temporary files in serverless environments
-            if os.path.exists(file1_path):
-                os.remove(file1_path)
-            if os.path.exists(file2_path):
-                os.remove(file2_path)
-
-        similarity = difflib.SequenceMatcher(None, text1, text2).ratio()
-        differences = list(difflib.unified_diff(
-            text1.splitlines(),
-            text2.splitlines(),
-            fromfile='File 1',
-            tofile='File 2',
-            lineterm=''
-        ))
+            self._remove_files(file_path)
+
+    def _remove_files(self, *file_paths: str) -> None:
+        """Clean up temporary files in serverless environments."""
+        for file_path in file_paths:
+            _unlink_quietly(file_path)
+
+    def _build_result(self, text1: str, text2: str) -> ComparisonResult:
+        """Score and diff two extracted texts."""
+        similarity, differences = self._cached_score_and_diff(text1, text2)
 
         return ComparisonResult(
             similarity_score=similarity,
@@ -106,6 +445,113 @@ class DrawingComparator:
             file2_text=text2
         )
 
+    def _cached_score_and_diff(self, text1: str, text2: str) -> Tuple[float, List[str]]:
+        """Serve the score and diff for a previously compared (text1, text2) pair from disk."""
+        # Identical text (e.g. the same drawing uploaded twice) needs no matching at all
+        if text1 == text2:
+            return 1.0, []
+
+        if not RESULT_CACHE_DIR:
+            return self._score_and_diff(text1, text2)
+
+        # The prefix ties entries to the scoring version and settings that produced them
+        key = f"{RESULT_CACHE_PREFIX}-q{self.ratio_skip_threshold}_{_content_digest(text1.encode('utf-8'))}_{_content_digest(text2.encode('utf-8'))}"
+        cache_path = os.path.join(RESULT_CACHE_DIR, f"{key}.json")
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = orjson.loads(f.read())
+            result = cached['similarity_score'], cached['differences']
+        except (OSError, ValueError, KeyError):
+            pass
+        else:
+            _mark_cache_file_used(cache_path)
+            return result
+
+        similarity, differences = self._score_and_diff(text1, text2)
+        _write_cache_file(
+            cache_path,
+            orjson.dumps({'similarity_score': similarity, 'differences': differences}).decode('utf-8'),
+            RESULT_CACHE_SIZE
+        )
+        return similarity, differences
+
+    def _score_and_diff(self, text1: str, text2: str) -> Tuple[float, List[str]]:
+        """Return the similarity ratio and unified diff lines for two different texts.
+
+        The diff always comes from the exact line alignment. When the quick_ratio()-style
+        upper bound is below ratio_skip_threshold the texts are clearly different, and
+        that bound is reported as the score instead of matching the replaced regions
+        character by character; it can overestimate the exact score, never underestimate it.
+        """
+        # OCR text is line-oriented, so match whole lines rather than characters
+        lines1 = text1.splitlines()
+        lines2 = text2.splitlines()
+
+        # One alignment feeds both the score and the diff, instead of unified_diff matching again
+        opcodes = _opcodes_from_blocks(self._match_lines(lines1, lines2), len(lines1), len(lines2))
+        # The diff is generated lazily, so lines past the cap are never formatted
+        differences = list(islice(_unified_diff(lines1, lines2, opcodes), MAX_DIFF_LINES + 1))
+        if len(differences) > MAX_DIFF_LINES:
+            differences[MAX_DIFF_LINES:] = [f"... diff truncated after {MAX_DIFF_LINES} lines"]
+
+        # Nothing can match against an empty side, so the diff is a full replacement
+        if not text1 or not text2:
+            return 0.0, differences
+
+        upper_bound = self._ratio_upper_bound(lines1, lines2)
+        if upper_bound < self.ratio_skip_threshold:
+            return upper_bound, differences
+        return self._weighted_ratio(lines1, lines2, opcodes), differences
+
+    def _match_lines(self, lines1: List[str], lines2: List[str]) -> List[Tuple[int, int, int]]:
+        """Align two line lists, returning their matching blocks in order."""
+        # Shared title blocks and notes at either end match trivially; only the middle needs matching
+        prefix, suffix = _common_affix_lengths(lines1, lines2)
+        end1 = len(lines1) - suffix
+        end2 = len(lines2) - suffix
+
+        blocks = [(0, 0, prefix)] if prefix else []
+        # autojunk would discard frequent lines such as repeated "TYP." notes once a drawing passes 200 lines
+        matcher = SequenceMatcher(None, lines1[prefix:end1], lines2[prefix:end2], autojunk=False)
+        for i, j, size in matcher.get_matching_blocks():
+            if size:
+                blocks.append((prefix + i, prefix + j, size))
+        if suffix:
+            blocks.append((end1, end2, suffix))
+        return blocks
+
+    def _weighted_ratio(self, lines1: List[str], lines2: List[str],
+                        opcodes: List[Tuple[str, int, int, int, int]]) -> float:
+        """Character-level ratio of an alignment, on the same scale as a character diff.
+
+        Equal lines count in full, line break included; replaced lines are matched
+        character by character (line breaks excluded), so a one-character OCR or
+        revision edit only costs that character.
+        """
+        total = sum(len(line) + 1 for line in lines1) + sum(len(line) + 1 for line in lines2)
+        if not total:
+            return 1.0
+        matched = 0
+        for tag, i1, i2, j1, j2 in opcodes:
+            if tag == 'equal':
+                matched += sum(len(line) + 1 for line in lines1[i1:i2])
+            elif tag == 'replace':
+                matched += _replaced_chars_matched(lines1[i1:i2], lines2[j1:j2])
+        return 2.0 * matched / total
+
+    def _ratio_upper_bound(self, lines1: List[str], lines2: List[str]) -> float:
+        """Counterpart of quick_ratio() for _weighted_ratio: an upper bound on the score of any alignment.
+
+        No alignment matches more characters than the texts share, and line breaks
+        only count for lines that appear in both.
+        """
+        total = sum(len(line) + 1 for line in lines1) + sum(len(line) + 1 for line in lines2)
+        if not total:
+            return 1.0
+        shared_chars = Counter(''.join(lines1)) & Counter(''.join(lines2))
+        shared_lines = Counter(lines1) & Counter(lines2)
+        return 2.0 * (shared_chars.total() + shared_lines.total()) / total
+
 # Example usage
 if __name__ == "__main__":
     comparator = DrawingComparator()
@@ -117,7 +563,6 @@ if __name__ == "__main__":
         result = comparator.compare_drawings(file1, file2)
         print(f"Similarity score: {result.similarity_score:.2%}")
         print("\nDifferences found:")
-        for diff in result.differences[:10]:  # Show first 10 differences
-            print(diff)
+        print(*result.differences[:10], sep="\n")  # Show first 10 differences in one write
     except Exception as e:
         print(f"Error: {str(e)}")
\ No newline at end of file